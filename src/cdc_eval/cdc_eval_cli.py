@@ -16,8 +16,6 @@ import argparse
 import logging
 import sys
 
-from cdc_eval import kaggle_online_retail_ii_uci
-
 
 class CDCEvalCLI:
 
@@ -68,6 +66,12 @@ class CDCEvalCLI:
 
     @classmethod
     def _use_kaggle_online_retail_uci_ds(cls, args):
+        # Deferred so that pandas and SQLAlchemy are only imported when the
+        # subcommand actually runs, keeping `cdc-eval --help` and the package
+        # import lightweight.
+        # pylint: disable=import-outside-toplevel
+        from cdc_eval import kaggle_online_retail_ii_uci
+
         kaggle_online_retail_ii_uci.Runner.run(data_file=args.data_file,
                                                invoices=int(args.invoices),
                                                db_conn=args.db_conn,
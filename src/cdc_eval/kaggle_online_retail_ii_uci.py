@@ -21,6 +21,7 @@ https://www.kaggle.com/datasets/mashlyn/online-retail-ii-uci.
 
 import logging
 import time
+from typing import List
 
 import pandas as pd
 from pandas import DataFrame
@@ -39,7 +40,8 @@ class CSVFilesReader:
     def read_transactions(cls, file: str) -> DataFrame:
         logging.info('')
         logging.info('Reading the transactions file...')
-        df = pd.read_csv(file)
+        df = pd.read_csv(file, dtype=TransactionsCodec.CSV_DTYPES)
+        df = TransactionsCodec.encode(df)
         logging.info('DONE!')
 
         PandasHelper.print_df_metadata(df)
@@ -47,6 +49,55 @@ class CSVFilesReader:
         return df
 
 
+"""
+Transactions codec
+========================================
+"""
+
+
+class TransactionsCodec:
+    # In memory, `Invoice` is an integer key with its letter prefix -- e.g., 'C'
+    # for cancellations or 'A' for bad debt adjustments -- in a categorical
+    # `InvoicePrefix` column, and repetitive text columns are categoricals too.
+    # Values are decoded back to strings only when rows are bound to SQL
+    # parameters.
+    CATEGORICAL_COLUMNS = ('StockCode', 'Description', 'Country')
+    CSV_DTYPES = {'Invoice': str, **dict.fromkeys(CATEGORICAL_COLUMNS, 'category')}
+    INVOICE_PREFIX_COLUMN = 'InvoicePrefix'
+    INVOICE_KEY_COLUMNS = ['Invoice', INVOICE_PREFIX_COLUMN]
+
+    @classmethod
+    def encode(cls, df: DataFrame) -> DataFrame:
+        invoice_parts = df['Invoice'].astype(str).str.extract(
+            r'^(?P<prefix>[A-Za-z]*)(?P<number>[1-9]\d*|0)$')
+
+        categorical_columns = [
+            column for column in cls.CATEGORICAL_COLUMNS if column in df.columns
+        ]
+        encoded = df.astype({column: 'category' for column in categorical_columns})
+        # Fails loudly, rather than falling back to strings, if an invoice does
+        # not match the expected <prefix><number> format. Numbers with leading
+        # zeros are rejected too, as they would not survive the int round trip.
+        encoded['Invoice'] = pd.to_numeric(invoice_parts['number'].astype('int64'),
+                                           downcast='integer')
+        encoded[cls.INVOICE_PREFIX_COLUMN] = invoice_parts['prefix'].astype('category')
+
+        return encoded
+
+    @classmethod
+    def decode(cls, df: DataFrame) -> DataFrame:
+        decoded = df.drop(columns=cls.INVOICE_PREFIX_COLUMN)
+        invoice_prefixes = df[cls.INVOICE_PREFIX_COLUMN].astype(str)
+        decoded['Invoice'] = invoice_prefixes + df['Invoice'].astype(str)
+
+        categorical_columns = decoded.select_dtypes('category').columns
+        return decoded.astype({column: object for column in categorical_columns})
+
+    @classmethod
+    def format_invoice(cls, invoice, prefix: str) -> str:
+        return f'{prefix}{invoice}'
+
+
 """
 Transactions database manager
 ========================================
@@ -70,8 +121,12 @@ class TransactionsDBManager:
         logging.info('')
         logging.info('Deleting invoices...')
 
-        for invoice in transactions['Invoice'].unique():
-            invoice_items = transactions[transactions['Invoice'] == invoice]
+        invoice_groups = transactions.groupby(TransactionsCodec.INVOICE_KEY_COLUMNS,
+                                              sort=False,
+                                              observed=True)
+        for (invoice_key, invoice_prefix), invoice_group in invoice_groups:
+            invoice = TransactionsCodec.format_invoice(invoice_key, invoice_prefix)
+            invoice_items = TransactionsCodec.decode(invoice_group)
             logging.info('')
             logging.info('  Deleting invoice "%s" with %d items...', invoice,
                          len(invoice_items))
@@ -99,20 +154,23 @@ class TransactionsDBManager:
         logging.info('')
         logging.info('Inserting invoices...')
 
-        db_columns_df = transactions.rename(
-            columns={
-                'Invoice': 'invoice',
-                'StockCode': 'stock_code',
-                'Description': 'description',
-                'Quantity': 'quantity',
-                'InvoiceDate': 'invoice_date',
-                'Price': 'price',
-                'Customer ID': 'customer_id',
-                'Country': 'country'
-            })
-
-        for invoice in transactions['Invoice'].unique():
-            invoice_items = db_columns_df[db_columns_df['invoice'] == invoice]
+        invoice_groups = transactions.groupby(TransactionsCodec.INVOICE_KEY_COLUMNS,
+                                              sort=False,
+                                              observed=True)
+        for (invoice_key, invoice_prefix), invoice_group in invoice_groups:
+            invoice = TransactionsCodec.format_invoice(invoice_key, invoice_prefix)
+            # Strings are only materialized for the rows about to be written.
+            invoice_items = TransactionsCodec.decode(invoice_group).rename(
+                columns={
+                    'Invoice': 'invoice',
+                    'StockCode': 'stock_code',
+                    'Description': 'description',
+                    'Quantity': 'quantity',
+                    'InvoiceDate': 'invoice_date',
+                    'Price': 'price',
+                    'Customer ID': 'customer_id',
+                    'Country': 'country'
+                })
             logging.info('')
             logging.info('  Inserting invoice "%s" with %d items...', invoice,
                          len(invoice_items))
@@ -163,31 +221,29 @@ class PandasHelper:
         logging.info('==================================================')
 
     @classmethod
-    def get_unique_values(cls, df: DataFrame, column: str) -> DataFrame:
+    def get_unique_values(cls, df: DataFrame, columns: List[str]) -> DataFrame:
         logging.info('')
-        logging.info('Getting unique values for "%s"...', column)
-        unique_values = df[column].unique()
-        logging.info('  > %d found', len(unique_values))
+        logging.info('Getting unique values for %s...', columns)
+        unique_values_df = df[columns].drop_duplicates(ignore_index=True)
+        logging.info('  > %d found', len(unique_values_df))
         logging.info('DONE!')
 
-        unique_values_df = pd.DataFrame(unique_values, columns=[column])
         cls.print_df_metadata(unique_values_df)
 
         return unique_values_df
 
     @classmethod
-    def select_random_subsets(cls, df: DataFrame, id_column: str, n: int) -> DataFrame:
+    def select_random_subsets(cls, df: DataFrame, id_columns: List[str],
+                              n: int) -> DataFrame:
         logging.info('')
         logging.info('Selecting %d random subsets...', n)
-        unique_ids = cls.get_unique_values(df, id_column)
+        unique_ids = cls.get_unique_values(df, id_columns)
         random_ids = cls.select_random_items(unique_ids, n)
 
-        subsets = pd.DataFrame()
-
-        for _, row in random_ids.iterrows():
-            subset_id = row[id_column]
-            subset = df[df[id_column] == subset_id]
-            subsets = pd.concat([subsets, subset], ignore_index=True)
+        # Subsets are identified by the combination of all ID columns. Merging
+        # from the random IDs keeps subsets in the order they were sampled.
+        subsets = random_ids[id_columns].merge(df, on=id_columns,
+                                               how='inner')[df.columns]
 
         logging.info('DONE!')
 
@@ -223,7 +279,7 @@ class Runner:
 
         if invoices > 0:
             transactions_df = PandasHelper.select_random_subsets(
-                transactions_df, 'Invoice', invoices)
+                transactions_df, TransactionsCodec.INVOICE_KEY_COLUMNS, invoices)
 
         transactions_db_mgr = TransactionsDBManager(db_conn)
 
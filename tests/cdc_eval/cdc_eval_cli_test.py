@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import subprocess
+import sys
 import unittest
 from unittest import mock
 
@@ -80,7 +83,7 @@ class CDCEvalCLITest(unittest.TestCase):
         ])
         self.assertEqual(mock_use_kaggle_online_retail_uci_ds, args.func)
 
-    @mock.patch(f'{_CLI_MODULE}.kaggle_online_retail_ii_uci.Runner')
+    @mock.patch('cdc_eval.kaggle_online_retail_ii_uci.Runner')
     def test_use_kaggle_online_retail_uci_ds_inserts_tags_from_csv(self, mock_runner):
         cdc_eval_cli.CDCEvalCLI.run([
             'kaggle-online-retail-uci', '--data-file', 'test.csv', '--db-conn',
@@ -96,3 +99,23 @@ class CDCEvalCLITest(unittest.TestCase):
     def test_main_calls_cli_run(self, mock_run):
         cdc_eval.main()
         mock_run.assert_called_once()
+
+    def test_import_does_not_load_heavy_dependencies(self):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import cdc_eval'],
+            capture_output=True,
+            check=True,
+            env=env,
+            text=True)
+
+        # Each `-X importtime` line ends with the imported module name, e.g.:
+        # "import time:       123 |        456 |   pandas".
+        imported_modules = {
+            line.rsplit('|', 1)[-1].strip()
+            for line in result.stderr.splitlines() if line.startswith('import time:')
+        }
+        self.assertIn('cdc_eval.cdc_eval_cli', imported_modules)
+        self.assertNotIn('pandas', imported_modules)
+        self.assertNotIn('sqlalchemy', imported_modules)
+        self.assertNotIn('cdc_eval.kaggle_online_retail_ii_uci', imported_modules)
@@ -27,15 +27,98 @@ class CSVFilesReaderTest(unittest.TestCase):
 
     @mock.patch(f'{_ONLINE_RETAIL_MODULE}.pd.read_csv')
     def test_read_transactions_reads_csv(self, mock_read_csv):
+        mock_read_csv.return_value = pd.DataFrame({'Invoice': ['489434']})
         online_retail.CSVFilesReader.read_transactions('test.csv')
-        mock_read_csv.assert_called_once_with('test.csv')
+        mock_read_csv.assert_called_once_with(
+            'test.csv', dtype=online_retail.TransactionsCodec.CSV_DTYPES)
 
     @mock.patch(f'{_ONLINE_RETAIL_MODULE}.pd.read_csv')
-    def test_read_transactions_returns_data_frame_on_success(self, mock_read_csv):
-        data_frame = pd.DataFrame()
-        mock_read_csv.return_value = data_frame
+    def test_read_transactions_returns_encoded_data_frame_on_success(
+            self, mock_read_csv):
+
+        mock_read_csv.return_value = pd.DataFrame({
+            'Invoice': ['489434', 'C489449'],
+            'Country': ['United Kingdom', 'France']
+        })
+
         transactions = online_retail.CSVFilesReader.read_transactions('test.csv')
-        self.assertTrue(data_frame.equals(transactions))
+
+        self.assertTrue(pd.api.types.is_integer_dtype(transactions['Invoice']))
+        self.assertEqual([489434, 489449], transactions['Invoice'].tolist())
+        self.assertEqual(['', 'C'], transactions['InvoicePrefix'].tolist())
+        self.assertIsInstance(transactions['Country'].dtype, pd.CategoricalDtype)
+
+
+class TransactionsCodecTest(unittest.TestCase):
+
+    def test_encode_splits_invoice_into_int_key_and_prefix(self):
+        df = pd.DataFrame({'Invoice': ['489434', 'C489449', '489435']})
+
+        encoded = online_retail.TransactionsCodec.encode(df)
+
+        self.assertTrue(pd.api.types.is_integer_dtype(encoded['Invoice']))
+        self.assertEqual([489434, 489449, 489435], encoded['Invoice'].tolist())
+        self.assertIsInstance(encoded['InvoicePrefix'].dtype, pd.CategoricalDtype)
+        self.assertEqual(['', 'C', ''], encoded['InvoicePrefix'].tolist())
+
+    def test_encode_keeps_int_key_for_any_letter_prefix(self):
+        df = pd.DataFrame({'Invoice': ['489434', 'C489449', 'A506401']})
+
+        encoded = online_retail.TransactionsCodec.encode(df)
+
+        self.assertTrue(pd.api.types.is_integer_dtype(encoded['Invoice']))
+        self.assertEqual([489434, 489449, 506401], encoded['Invoice'].tolist())
+        self.assertEqual(['', 'C', 'A'], encoded['InvoicePrefix'].tolist())
+
+    def test_encode_malformed_invoice_raises_value_error(self):
+        df = pd.DataFrame({'Invoice': ['489434', '48-9449']})
+
+        self.assertRaises(ValueError, online_retail.TransactionsCodec.encode, df)
+
+    def test_encode_invoice_with_leading_zeros_raises_value_error(self):
+        for invoice in ('0489434', 'C0012'):
+            df = pd.DataFrame({'Invoice': ['489434', invoice]})
+
+            self.assertRaises(ValueError, online_retail.TransactionsCodec.encode, df)
+
+    def test_encode_converts_text_columns_to_categories(self):
+        df = pd.DataFrame({
+            'Invoice': ['489434', '489434'],
+            'StockCode': ['85048', '79323P'],
+            'Description':
+            ['15CM CHRISTMAS GLASS BALL 20 LIGHTS', 'PINK CHERRY LIGHTS'],
+            'Quantity': [12, 12],
+            'Country': ['United Kingdom', 'United Kingdom']
+        })
+
+        encoded = online_retail.TransactionsCodec.encode(df)
+
+        for column in ('StockCode', 'Description', 'Country'):
+            self.assertIsInstance(encoded[column].dtype, pd.CategoricalDtype)
+        self.assertTrue(pd.api.types.is_integer_dtype(encoded['Quantity']))
+
+    def test_decode_restores_string_values(self):
+        df = pd.DataFrame({
+            'Invoice': ['489434', 'C489449', 'A506401'],
+            'StockCode': ['85048', '79323P', 'B'],
+            'Country': ['United Kingdom', 'France', 'United Kingdom']
+        })
+
+        decoded = online_retail.TransactionsCodec.decode(
+            online_retail.TransactionsCodec.encode(df))
+
+        self.assertNotIn('InvoicePrefix', decoded.columns)
+        self.assertEqual(['489434', 'C489449', 'A506401'], decoded['Invoice'].tolist())
+        self.assertEqual(['85048', '79323P', 'B'], decoded['StockCode'].tolist())
+        self.assertEqual(['United Kingdom', 'France', 'United Kingdom'],
+                         decoded['Country'].tolist())
+        self.assertFalse(isinstance(decoded['Country'].dtype, pd.CategoricalDtype))
+
+    def test_format_invoice_puts_prefix_back(self):
+        self.assertEqual('489434',
+                         online_retail.TransactionsCodec.format_invoice(489434, ''))
+        self.assertEqual('C489449',
+                         online_retail.TransactionsCodec.format_invoice(489449, 'C'))
 
 
 class TransactionsDBManagerTest(unittest.TestCase):
@@ -63,16 +146,23 @@ class TransactionsDBManagerTest(unittest.TestCase):
                 'DOOR MAT BLACK FLOCK', 'LOVE BUILDING BLOCK WORD',
                 'CHRISTMAS CRAFT HEART DECORATIONS'
             ],
-            'Quantity': [12, 12, 12, 18, 18, 6]
+            'Quantity': [12, 12, 12, 18, 18, 6],
+            'InvoicePrefix': ['', '', '', '', '', 'C']
         })
         mock_conn = mock_create_engine.return_value
 
-        self._db_manager.delete_invoices(transactions, 0)
+        with self.assertLogs(level='INFO') as logs:
+            self._db_manager.delete_invoices(transactions, 0)
 
         mock_create_engine.assert_called_once_with('test-db-conn')
         mock_get_existing_table.assert_called_once_with(mock_conn, 'transactions')
         self.assertEqual(mock_delete.call_count, 4)  # One call for each invoice number
 
+        # Logged invoice items are decoded, matching the invoice used in the DELETE.
+        logged_items = '\n'.join(logs.output)
+        self.assertIn('C489437', logged_items)
+        self.assertNotIn('InvoicePrefix', logged_items)
+
     @mock.patch(f'{_ONLINE_RETAIL_MODULE}.pd.io.sql.to_sql')
     @mock.patch(f'{_ONLINE_RETAIL_MODULE}.sqlalchemy.create_engine')
     def test_insert_invoices_inserts_item_batches_grouped_by_invoice(
@@ -86,7 +176,8 @@ class TransactionsDBManagerTest(unittest.TestCase):
                 'DOOR MAT BLACK FLOCK', 'LOVE BUILDING BLOCK WORD',
                 'CHRISTMAS CRAFT HEART DECORATIONS'
             ],
-            'Quantity': [12, 12, 12, 18, 18, 6]
+            'Quantity': [12, 12, 12, 18, 18, 6],
+            'InvoicePrefix': ['', '', '', '', '', 'C']
         })
 
         self._db_manager.insert_invoices(transactions, 0)
@@ -94,6 +185,13 @@ class TransactionsDBManagerTest(unittest.TestCase):
         mock_create_engine.assert_called_once_with('test-db-conn')
         self.assertEqual(mock_to_sql.call_count, 4)  # One call for each invoice
 
+        written_invoices = [
+            call.args[0]['invoice'].tolist() for call in mock_to_sql.call_args_list
+        ]
+        self.assertEqual(
+            [['489434', '489434'], ['489435'], ['489436', '489436'], ['C489437']],
+            written_invoices)
+
     @mock.patch(f'{_ONLINE_RETAIL_MODULE}.sqlalchemy.MetaData')
     def test_get_existing_table_returns_table_if_exists(self, mock_metadata):
         mock_conn = mock.MagicMock()
@@ -122,12 +220,7 @@ class TransactionsDBManagerTest(unittest.TestCase):
 class PandasHelperTest(unittest.TestCase):
     _PANDAS_HELPER_CLASS = f'{_ONLINE_RETAIL_MODULE}.PandasHelper'
 
-    @mock.patch(f'{_ONLINE_RETAIL_MODULE}.pd.core.series.Series.unique')
-    def test_get_unique_values_returns_dataframe_with_unique_values_for_column(
-            self, mock_unique):
-
-        column = 'Invoice'
-
+    def test_get_unique_values_returns_dataframe_with_unique_values_for_columns(self):
         df = pd.DataFrame({
             'Invoice': [489434, 489434, 489435, 489436, 489436, 489437],
             'StockCode': ['85048', '79323P', '22350', '48173C', '21755', '22143'],
@@ -138,20 +231,34 @@ class PandasHelperTest(unittest.TestCase):
             ],
             'Quantity': [12, 12, 12, 18, 18, 6]
         })
-        mock_unique.return_value = [489434, 489435, 489436, 489437]
 
-        unique_values = online_retail.PandasHelper.get_unique_values(df, column)
+        unique_values = online_retail.PandasHelper.get_unique_values(df, ['Invoice'])
 
-        expected_df = pd.DataFrame({column: [489434, 489435, 489436, 489437]})
+        expected_df = pd.DataFrame({'Invoice': [489434, 489435, 489436, 489437]})
+        pd.testing.assert_frame_equal(expected_df, unique_values)
+
+    def test_get_unique_values_combines_all_columns(self):
+        df = pd.DataFrame({
+            'Invoice': [5, 5, 5, 6],
+            'InvoicePrefix': ['', 'C', 'C', ''],
+            'Quantity': [1, -1, -2, 3]
+        })
+
+        unique_values = online_retail.PandasHelper.get_unique_values(
+            df, ['Invoice', 'InvoicePrefix'])
+
+        expected_df = pd.DataFrame({
+            'Invoice': [5, 5, 6],
+            'InvoicePrefix': ['', 'C', '']
+        })
         pd.testing.assert_frame_equal(expected_df, unique_values)
-        mock_unique.asset_called_once()
 
     @mock.patch(f'{_PANDAS_HELPER_CLASS}.select_random_items')
     @mock.patch(f'{_PANDAS_HELPER_CLASS}.get_unique_values')
     def test_select_random_subsets_returns_dataframe_of_specified_size(
             self, mock_get_unique_values, mock_select_random_items):
 
-        id_column = 'Invoice'
+        id_columns = ['Invoice']
 
         df = pd.DataFrame({
             'Invoice': [489434, 489434, 489435, 489436, 489436, 489437],
@@ -164,13 +271,13 @@ class PandasHelperTest(unittest.TestCase):
             'Quantity': [12, 12, 12, 18, 18, 6]
         })
 
-        unique_values = pd.DataFrame({id_column: [489434, 489435, 489436, 489437]})
+        unique_values = pd.DataFrame({'Invoice': [489434, 489435, 489436, 489437]})
         mock_get_unique_values.return_value = unique_values
 
-        random_items = pd.DataFrame({id_column: [489434, 489436]})
+        random_items = pd.DataFrame({'Invoice': [489434, 489436]})
         mock_select_random_items.return_value = random_items
 
-        subsets = online_retail.PandasHelper.select_random_subsets(df, id_column, 2)
+        subsets = online_retail.PandasHelper.select_random_subsets(df, id_columns, 2)
 
         expected_df = pd.DataFrame({
             'Invoice': [489434, 489434, 489436, 489436],
@@ -182,8 +289,51 @@ class PandasHelperTest(unittest.TestCase):
             'Quantity': [12, 12, 18, 18]
         })
         pd.testing.assert_frame_equal(expected_df, subsets)
-        mock_get_unique_values.asset_called_once_with(df, 'Invoice')
-        mock_select_random_items.asset_called_once_with(unique_values, 2)
+        mock_get_unique_values.assert_called_once_with(df, id_columns)
+        mock_select_random_items.assert_called_once_with(unique_values, 2)
+
+    @mock.patch(f'{_PANDAS_HELPER_CLASS}.select_random_items')
+    def test_select_random_subsets_keeps_sampled_order(self, mock_select_random_items):
+        id_columns = ['Invoice']
+
+        df = pd.DataFrame({
+            'Invoice': [489434, 489434, 489435, 489436, 489436, 489437],
+            'Quantity': [12, 12, 12, 18, 18, 6]
+        })
+
+        mock_select_random_items.return_value = pd.DataFrame(
+            {'Invoice': [489437, 489434, 489436]})
+
+        subsets = online_retail.PandasHelper.select_random_subsets(df, id_columns, 3)
+
+        expected_df = pd.DataFrame({
+            'Invoice': [489437, 489434, 489434, 489436, 489436],
+            'Quantity': [6, 12, 12, 18, 18]
+        })
+        pd.testing.assert_frame_equal(expected_df, subsets)
+
+    @mock.patch(f'{_PANDAS_HELPER_CLASS}.select_random_items')
+    def test_select_random_subsets_tells_apart_ids_sharing_a_column_value(
+            self, mock_select_random_items):
+
+        id_columns = ['Invoice', 'InvoicePrefix']
+
+        df = online_retail.TransactionsCodec.encode(
+            pd.DataFrame({
+                'Invoice': ['5', 'C5', 'C5', '6'],
+                'Quantity': [1, -1, -2, 3]
+            }))
+
+        mock_select_random_items.side_effect = lambda unique_ids, n: unique_ids[
+            unique_ids['InvoicePrefix'] == 'C']
+
+        subsets = online_retail.PandasHelper.select_random_subsets(df, id_columns, 1)
+
+        unique_ids = mock_select_random_items.call_args.args[0]
+        self.assertEqual(3, len(unique_ids))  # '5', 'C5' and '6'
+        self.assertEqual([5, 5], subsets['Invoice'].tolist())
+        self.assertEqual(['C', 'C'], subsets['InvoicePrefix'].tolist())
+        self.assertEqual([-1, -2], subsets['Quantity'].tolist())
 
     @mock.patch(f'{_ONLINE_RETAIL_MODULE}.pd.DataFrame.sample')
     def test_select_random_items_returns_dataframe_of_specified_size(self, mock_sample):
@@ -235,8 +385,8 @@ class RunnerTest(unittest.TestCase):
         online_retail.Runner.run('test.csv', 1000, mock_conn, 0, 'insert')
 
         mock_read_transactions.assert_called_once_with('test.csv')
-        mock_select_random_subsets.assert_called_once_with(transactions_df, 'Invoice',
-                                                           1000)
+        mock_select_random_subsets.assert_called_once_with(
+            transactions_df, online_retail.TransactionsCodec.INVOICE_KEY_COLUMNS, 1000)
 
     @mock.patch(f'{_ONLINE_RETAIL_MODULE}.TransactionsDBManager')
     @mock.patch(f'{_CSV_READER_CLASS}.read_transactions', lambda *args: None)